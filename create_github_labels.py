@@ -3,13 +3,17 @@
 ## @file create_github_labels.py
 #  @brief A script to create GitHub issue labels.
 #
-#  @details This script creates a set of predefined labels in a GitHub repository.
-#           It uses the GitHub API to post label data, which includes the label's
-#           name, color, and description.
+#  @details This script synchronizes a GitHub repository with a set of predefined labels.
+#           It uses the GitHub API to create, update, or delete labels, each of which
+#           includes the label's name, color, and description.
 #
 #           Key features:
 #           - Configurable repository and owner.
 #           - Secure token input using getpass.
+#           - A single pooled HTTP session reused for every API call.
+#           - Automatic retries with backoff for rate limits and transient server errors.
+#           - Only missing, outdated, or extra labels are touched, so re-running is cheap.
+#           - Label requests issued in parallel, with progress reported through logging.
 #           - Predefined set of labels useful for issue tracking.
 #
 #  @code
@@ -19,10 +23,8 @@
 #  Enter your GitHub username: [Your GitHub Username Here]
 #  Enter your repository name: [Your Repository Name Here]
 #  Enter your GitHub token: [Your GitHub Personal Access Token Here]
-#  Successfully deleted label: bug
-#  Successfully deleted label: enhancement
-#  ...
-#  Successfully created label: bug
+#  Successfully deleted label: obsolete
+#  Successfully updated label: bug
 #  Successfully created label: enhancement
 #  ...
 #  ```
@@ -37,91 +39,238 @@
 #  @author Evgenii Shiliaev
 #  @date December 04, 2023
 
+import json
+import logging
+import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from getpass import getpass
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+from urllib3.util.retry import Retry
 
+## Module logger used for status reporting.
+log = logging.getLogger(__name__)
 
-## @brief Deletes all existing labels from a GitHub repository.
-#  @details This function retrieves all labels currently present in the specified GitHub repository
-#           and deletes each one of them. It uses the GitHub API to fetch and delete labels.
-#           For each label, a DELETE request is sent, and the function prints the status of each deletion attempt.
-#
-#  @param api_url The base URL of the GitHub API.
-#  @param repo_owner The username of the owner of the GitHub repository.
-#  @param repo_name The name of the repository from which to delete the labels.
-#  @param headers Dictionary of API request headers for authentication and to specify the API version.
-#
-#  @pre The GitHub token used must have permissions to delete labels in the specified repository.
-#  @pre Repository owner and name must be correctly configured.
+## Maximum number of label requests in flight; kept low to respect GitHub's secondary rate limits.
+MAX_WORKERS = 8
+
+## Label fields compared to decide whether an existing label needs updating.
+LABEL_FIELDS = ("name", "color", "description")
+
+## Predefined labels as (name, color, description) tuples, in the order of LABEL_FIELDS.
+LABELS = (
+    (
+        "bug",
+        "d73a4a",
+        "Indicates a problem that impairs or prevents the functions of the product",
+    ),
+    (
+        "dependencies",
+        "0366d6",
+        "Concerns outdated, broken, or problematic dependencies",
+    ),
+    (
+        "documentation",
+        "0075ca",
+        "Relates to improvements or additions to documentation",
+    ),
+    (
+        "duplicate",
+        "cfd3d7",
+        "Signals an issue that has already been reported, often with a reference to the original",
+    ),
+    (
+        "enhancement",
+        "a2eeef",
+        "Suggests a new feature or improvement to existing functionality",
+    ),
+    (
+        "environment",
+        "f9d0c4",
+        "Involves issues related to the project's development, testing, or production environment",
+    ),
+    (
+        "good first issue",
+        "7057ff",
+        "Suitable for first-time contributors, these issues are a great way to get involved",
+    ),
+    (
+        "help wanted",
+        "008672",
+        "Requests assistance from the community or team members for an issue or initiative",
+    ),
+    (
+        "invalid",
+        "e4e669",
+        "Marks an issue that is no longer relevant or that has been filed incorrectly",
+    ),
+    (
+        "performance",
+        "fbca04",
+        "Highlights areas of the codebase that could be optimized for speed and efficiency",
+    ),
+    (
+        "question",
+        "d876e3",
+        "Seeks further information or clarification on a topic or issue",
+    ),
+    (
+        "refactor",
+        "1d76db",
+        "Suggests improvements for code organization or architecture without altering behavior",
+    ),
+    ("security", "b60205", "Concerns or reports related to security vulnerabilities"),
+    (
+        "test-case",
+        "5319e7",
+        "Indicates missing tests or proposes new ones for better coverage",
+    ),
+    (
+        "user-story",
+        "c2e0c6",
+        "Describes a software feature from an end-user perspective, focusing on their needs and experiences",
+    ),
+    (
+        "violation",
+        "e11d21",
+        "Pertains to vulnerabilities that could impact the security of the project",
+    ),
+    (
+        "wontfix",
+        "000000",
+        "Acknowledges an issue that the project has decided not to address at the present time",
+    ),
+)
+
+## HTTP status code GitHub returns on success for each label operation.
+EXPECTED_STATUS = {"create": 201, "update": 200, "delete": 204}
+
+## Per-request headers for bodies that are already serialized to JSON.
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+## @brief Builds request keyword arguments carrying a pre-serialized JSON body.
+#  @details Encoding the payload up front lets each POST or PATCH send ready-made bytes
+#           instead of having requests serialize the dictionary for every request.
 #
-#  @post All existing labels in the specified repository are deleted.
+#  @param payload The dictionary to send as the JSON request body.
 #
-#  @note This function is useful for label management and preventing conflicts when creating new labels.
+#  @return A dictionary of keyword arguments for a requests.Session method.
+def json_body(payload):
+    return {"data": json.dumps(payload).encode(), "headers": JSON_HEADERS}
+
+
+## @brief Fetches every label defined in a GitHub repository.
+#  @details Labels are requested 100 per page and the `next` links of the paginated response are followed
+#           until all pages have been retrieved.
 #
-#  @warning Ensure that the GitHub token is kept secure and not logged or displayed.
+#  @param api_url The base URL of the GitHub API.
+#  @param repo_owner The username of the owner of the GitHub repository.
+#  @param repo_name The name of the repository whose labels are fetched.
+#  @param session A requests.Session carrying the authentication and API version headers.
 #
-#  @todo Consider handling network errors and unauthorized access more gracefully.
-def delete_existing_labels(api_url, repo_owner, repo_name, headers):
-    response = requests.get(
-        f"{api_url}/repos/{repo_owner}/{repo_name}/labels", headers=headers
-    )
-    if response.status_code == 200:
-        existing_labels = response.json()
-        for label in existing_labels:
-            delete_response = requests.delete(
-                f"{api_url}/repos/{repo_owner}/{repo_name}/labels/{label['name']}",
-                headers=headers,
-            )
-            if delete_response.status_code == 204:
-                print(f"Successfully deleted label: {label['name']}")
-            else:
-                print(
-                    f"Failed to delete label: {label['name']} - {delete_response.content}"
-                )
+#  @return A list of label dictionaries, or None if any page could not be retrieved.
+def fetch_existing_labels(api_url, repo_owner, repo_name, session):
+    existing_labels = []
+    url = f"{api_url}/repos/{repo_owner}/{repo_name}/labels?per_page=100"
+    while url:
+        response = session.get(url)
+        if response.status_code != 200:
+            log.error("Failed to fetch labels - %s", response.content)
+            return None
+        existing_labels.extend(response.json())
+        url = response.links.get("next", {}).get("url")
+    return existing_labels
 
 
-## @brief Creates a set of predefined labels in a GitHub repository.
-#  @details This function iterates through a list of label definitions and creates each label in the specified GitHub repository.
-#           Each label is defined by its name, color, and description. The GitHub API is used to create these labels.
-#           The function prints out the status of each label creation attempt.
+## @brief Synchronizes the labels of a GitHub repository with a set of predefined labels.
+#  @details This function retrieves all labels currently present in the specified GitHub repository and
+#           compares them by name (case-insensitively) with the desired label definitions. Only the differences
+#           are sent to the GitHub API:
+#           - labels missing from the repository are created with a POST request,
+#           - labels not in the desired set are deleted with a DELETE request,
+#           - labels whose name casing, color, or description differ are updated with a PATCH request.
 #
-#  @param labels_to_create A list of dictionaries, each dictionary containing the 'name', 'color', and 'description' for a label.
+#           The requests are sent in parallel on a thread pool, and the function logs the status of each
+#           attempt as it completes. When the repository already matches, no write request is sent.
 #
-#  @pre The GitHub token used must have permissions to create labels in the specified repository.
-#  @pre Repository owner and name must be correctly configured.
+#  @param api_url The base URL of the GitHub API.
+#  @param repo_owner The username of the owner of the GitHub repository.
+#  @param repo_name The name of the repository whose labels are synchronized.
+#  @param session A requests.Session carrying the authentication and API version headers.
+#  @param labels A sequence of (name, color, description) tuples describing the desired labels; defaults to LABELS.
 #
-#  @post Labels are created in the specified repository, unless an error occurs.
+#  @pre The GitHub token used must have permissions to manage labels in the specified repository.
+#  @pre Repository owner and name must be correctly configured.
 #
-#  @note This function does not handle label creation conflicts (existing labels with the same name).
+#  @post The repository contains exactly the desired labels, unless an error occurs.
 #
 #  @warning Ensure that the GitHub token is kept secure and not logged or displayed.
 #
 #  @code
-#  create_labels(labels_to_create)
+#  sync_labels(api_url, repo_owner, repo_name, session)
 #  @endcode
 #
-#  @todo Implement error handling for network issues and unauthorized access.
-def create_labels(api_url, repo_owner, repo_name, headers, labels_to_create):
-    for label in labels_to_create:
-        response = requests.post(
-            f"{api_url}/repos/{repo_owner}/{repo_name}/labels",
-            headers=headers,
-            json=label,
-        )
-        if response.status_code == 201:
-            print(f"Successfully created label: {label['name']}")
-        else:
-            print(f"Failed to create label: {label['name']} - {response.content}")
+#  @todo Consider handling network errors and unauthorized access more gracefully.
+def sync_labels(api_url, repo_owner, repo_name, session, labels=LABELS):
+    existing_labels = fetch_existing_labels(api_url, repo_owner, repo_name, session)
+    if existing_labels is None:
+        return
+
+    existing = {label["name"].lower(): label for label in existing_labels}
+    desired = {label[0].lower(): label for label in labels}
+    labels_url = f"{api_url}/repos/{repo_owner}/{repo_name}/labels"
+
+    # Each operation is (action, label name, session method, URL, request kwargs)
+    operations = []
+    for key, label in existing.items():
+        if key not in desired:
+            url = f"{labels_url}/{quote(label['name'], safe='')}"
+            operations.append(("delete", label["name"], session.delete, url, {}))
+    for key, label in desired.items():
+        name, color, description = label
+        current = existing.get(key)
+        if current is None:
+            payload = dict(zip(LABEL_FIELDS, label))
+            operations.append(
+                ("create", name, session.post, labels_url, json_body(payload))
+            )
+        elif tuple(current[field] for field in LABEL_FIELDS) != label:
+            url = f"{labels_url}/{quote(current['name'], safe='')}"
+            payload = {"new_name": name, "color": color, "description": description}
+            operations.append(("update", name, session.patch, url, json_body(payload)))
+
+    if not operations:
+        log.info("All labels are already up to date")
+        return
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(send, url, **kwargs): (action, name)
+            for action, name, send, url, kwargs in operations
+        }
+        for future in as_completed(futures):
+            action, name = futures[future]
+            response = future.result()
+            if response.status_code == EXPECTED_STATUS[action]:
+                log.info("Successfully %sd label: %s", action, name)
+            else:
+                log.error("Failed to %s label: %s - %s", action, name, response.content)
 
 
 ## @mainpage
 #  @brief Entry point for the script execution.
 #
-#  @details This block executes when the script is run directly.
-#           It prompts the user for their GitHub username, repository name, and token.
-#           Then it proceeds to delete all existing labels and create new ones as specified.
+#  @details This function prompts the user for their GitHub username, repository name, and token,
+#           sets up a pooled HTTP session, and then synchronizes the repository's labels with the
+#           ones specified. It only runs when the script is executed directly, so the module can be
+#           imported without triggering network requests or prompts.
 #
-if __name__ == "__main__":
+def main():
+    # Report progress as plain messages on stdout
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # Configuration
     api_url = "https://api.github.com"
     # Prompt user for GitHub username
@@ -136,99 +285,32 @@ if __name__ == "__main__":
         "Accept": "application/vnd.github.v3+json",
     }
 
-    # List of labels to create
-    labels_to_create = [
-        {
-            "name": "bug",
-            "color": "d73a4a",
-            "description": "Indicates a problem that impairs or prevents the functions of the product",
-        },
-        {
-            "name": "dependencies",
-            "color": "0366d6",
-            "description": "Concerns outdated, broken, or problematic dependencies",
-        },
-        {
-            "name": "documentation",
-            "color": "0075ca",
-            "description": "Relates to improvements or additions to documentation",
-        },
-        {
-            "name": "duplicate",
-            "color": "cfd3d7",
-            "description": "Signals an issue that has already been reported, often with a reference to the original",
-        },
-        {
-            "name": "enhancement",
-            "color": "a2eeef",
-            "description": "Suggests a new feature or improvement to existing functionality",
-        },
-        {
-            "name": "environment",
-            "color": "f9d0c4",
-            "description": "Involves issues related to the project's development, testing, or production environment",
-        },
-        {
-            "name": "good first issue",
-            "color": "7057ff",
-            "description": "Suitable for first-time contributors, these issues are a great way to get involved",
-        },
-        {
-            "name": "help wanted",
-            "color": "008672",
-            "description": "Requests assistance from the community or team members for an issue or initiative",
-        },
-        {
-            "name": "invalid",
-            "color": "e4e669",
-            "description": "Marks an issue that is no longer relevant or that has been filed incorrectly",
-        },
-        {
-            "name": "performance",
-            "color": "fbca04",
-            "description": "Highlights areas of the codebase that could be optimized for speed and efficiency",
-        },
-        {
-            "name": "question",
-            "color": "d876e3",
-            "description": "Seeks further information or clarification on a topic or issue",
-        },
-        {
-            "name": "refactor",
-            "color": "1d76db",
-            "description": "Suggests improvements for code organization or architecture without altering behavior",
-        },
-        {
-            "name": "security",
-            "color": "b60205",
-            "description": "Concerns or reports related to security vulnerabilities",
-        },
-        {
-            "name": "test-case",
-            "color": "5319e7",
-            "description": "Indicates missing tests or proposes new ones for better coverage",
-        },
-        {
-            "name": "user-story",
-            "color": "c2e0c6",
-            "description": "Describes a software feature from an end-user perspective, focusing on their needs and experiences",
-        },
-        {
-            "name": "violation",
-            "color": "e11d21",
-            "description": "Pertains to vulnerabilities that could impact the security of the project",
-        },
-        {
-            "name": "wontfix",
-            "color": "000000",
-            "description": "Acknowledges an issue that the project has decided not to address at the present time",
-        },
-    ]
-
-# Delete all existing labels before creating new ones
-delete_existing_labels(api_url, repo_owner, repo_name, headers)
-
-# Create new labels
-create_labels(api_url, repo_owner, repo_name, headers, labels_to_create)
+    # Share one keep-alive session so every request reuses the same TLS connections.
+    # Only api.github.com is contacted, so a single host pool with one socket per worker suffices.
+    session = requests.Session()
+    session.headers.update(headers)
+    # Retry rate-limited and transiently failing requests, honoring GitHub's Retry-After header
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST", "DELETE", "PATCH"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=1,
+        pool_maxsize=MAX_WORKERS,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+
+    # Bring the repository's labels in line with LABELS
+    sync_labels(api_url, repo_owner, repo_name, session)
+
+
+if __name__ == "__main__":
+    main()
 
 # End of create_github_labels.py